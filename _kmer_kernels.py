@@ -0,0 +1,138 @@
+"""
+Numba kernels for k-mer matching.
+
+These live in their own importable module so their on-disk Numba cache is
+always written and read under the same module name, however
+rna-seq-annotator.py itself is run or imported.
+"""
+from typing import Tuple
+
+import numpy as np
+from numba import njit
+
+# Fibonacci hashing multiplier 0x9E3779B97F4A7C15 as a signed 64-bit integer
+HASH_MULTIPLIER = -7046029254386353131
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def score_kmer_batch(packed: np.ndarray,
+                     ambiguous: np.ndarray,
+                     offsets: np.ndarray,
+                     kmer_keys: np.ndarray,
+                     kmer_entries: np.ndarray,
+                     posting_offsets: np.ndarray,
+                     posting_terms: np.ndarray,
+                     inv_kmer_counts: np.ndarray,
+                     min_confidence: float,
+                     k: int,
+                     table_bits: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the matching terms of every sequence of a packed batch.
+    
+    Each k-mer of a sequence is looked up in the ontology's k-mer table and
+    credited once to every term containing it. A term matches when the
+    fraction of its distinct k-mers found reaches min_confidence.
+    
+    Args:
+        packed: 2-bit packed nucleotide codes
+        ambiguous: Ambiguous-base bitmask
+        offsets: Offsets of each sequence, in bases
+        kmer_keys: Slot keys of the k-mer hash table
+        kmer_entries: Posting list index of each slot
+        posting_offsets: Offsets of each posting list into posting_terms
+        posting_terms: Term indices containing each k-mer
+        inv_kmer_counts: Reciprocal of the number of distinct k-mers per term
+        min_confidence: Minimum confidence for a term to match
+        k: K-mer length
+        table_bits: Log2 of the k-mer hash table size
+        
+    Returns:
+        Tuple of (match offsets per sequence, matching term indices, average
+        confidence per sequence)
+    """
+    kmer_mask = (1 << (2 * k)) - 1
+    hash_shift = 64 - table_bits
+    slot_mask = (1 << table_bits) - 1
+    
+    n_sequences = len(offsets) - 1
+    n_terms = len(inv_kmer_counts)
+    
+    hits = np.zeros(n_terms, dtype=np.int32)
+    touched = np.empty(n_terms, dtype=np.int32)
+    last_seen = np.full(len(posting_offsets) - 1, -1, dtype=np.int64)
+    
+    match_offsets = np.zeros(n_sequences + 1, dtype=np.int64)
+    match_terms = np.empty(max(n_sequences, 16), dtype=np.int32)
+    confidences = np.zeros(n_sequences, dtype=np.float64)
+    n_matches = 0
+    
+    for i in range(n_sequences):
+        n_touched = 0
+        code = 0
+        run = 0
+        
+        # Bases are shifted out of a whole packed word (32 bases) and ambiguity
+        # byte (8 bases) at a time instead of being re-read for every position
+        word = 0
+        flags = np.int64(0)
+        for pos in range(offsets[i], offsets[i + 1]):
+            if pos == offsets[i] or (pos & 31) == 0:
+                word = packed[pos >> 5] >> ((pos & 31) << 1)
+            if pos == offsets[i] or (pos & 7) == 0:
+                flags = np.int64(ambiguous[pos >> 3]) >> (pos & 7)
+            base = word & 3
+            is_ambiguous = flags & 1
+            word >>= 2
+            flags >>= 1
+            
+            # Ambiguous bases break the rolling k-mer window
+            if is_ambiguous:
+                code = 0
+                run = 0
+                continue
+            code = ((code << 2) | base) & kmer_mask
+            run += 1
+            if run < k:
+                continue
+            
+            # Probe the k-mer hash table
+            entry = -1
+            slot = ((code * HASH_MULTIPLIER) >> hash_shift) & slot_mask
+            while kmer_keys[slot] != -1:
+                if kmer_keys[slot] == code:
+                    entry = kmer_entries[slot]
+                    break
+                slot = (slot + 1) & slot_mask
+            
+            # Credit each distinct k-mer of the sequence only once
+            if entry < 0 or last_seen[entry] == i:
+                continue
+            last_seen[entry] = i
+            for p in range(posting_offsets[entry], posting_offsets[entry + 1]):
+                term = posting_terms[p]
+                if hits[term] == 0:
+                    touched[n_touched] = term
+                    n_touched += 1
+                hits[term] += 1
+        
+        if n_matches + n_touched > len(match_terms):
+            grown = np.empty(max(2 * len(match_terms), n_matches + n_touched), dtype=np.int32)
+            grown[:n_matches] = match_terms[:n_matches]
+            match_terms = grown
+        
+        # Keep terms above the threshold and reset the scratch counters
+        total = 0.0
+        start = n_matches
+        for term in np.sort(touched[:n_touched]):
+            confidence = hits[term] * inv_kmer_counts[term]
+            hits[term] = 0
+            if confidence >= min_confidence:
+                match_terms[n_matches] = term
+                n_matches += 1
+                total += confidence
+        
+        match_offsets[i + 1] = n_matches
+        if n_matches > start:
+            confidences[i] = total / (n_matches - start)
+    
+    return match_offsets, match_terms[:n_matches], confidences
@@ -0,0 +1,77 @@
+# cython: language_level=3
+"""
+Compiled tokenizer for OBO ontology files.
+
+Build in place with ``cythonize -i _obo_parser.pyx``. rna-seq-annotator.py
+falls back to its regex tokenizer when this extension is not built.
+"""
+from libc.string cimport memchr
+
+
+cdef inline bint _is_space(char c):
+    return c == b' ' or c == b'\t' or c == b'\r'
+
+
+cdef inline bint _is_tag_char(char c):
+    return (b'a' <= c <= b'z') or (b'A' <= c <= b'Z') or c == b'_' or c == b'-'
+
+
+cdef class OboParser:
+    """
+    Iterate over the (tag, value) pairs of an OBO file held in memory.
+
+    Stanza headers such as ``[Term]`` are returned as ``(None, b'Term')``.
+    Lines that are neither a stanza header nor a tag-value pair are skipped.
+    """
+    cdef bytes data
+    cdef const char* buf
+    cdef Py_ssize_t pos
+    cdef Py_ssize_t size
+
+    def __cinit__(self, bytes data):
+        self.data = data
+        self.buf = data
+        self.pos = 0
+        self.size = len(data)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        cdef const char* line
+        cdef const char* found
+        cdef Py_ssize_t length
+        cdef Py_ssize_t key_end
+        cdef Py_ssize_t start
+        cdef Py_ssize_t i
+
+        while self.pos < self.size:
+            line = self.buf + self.pos
+            found = <const char*>memchr(line, b'\n', self.size - self.pos)
+            length = (found - line) if found != NULL else (self.size - self.pos)
+            self.pos += length + 1
+
+            while length > 0 and _is_space(line[length - 1]):
+                length -= 1
+            if length == 0:
+                continue
+
+            if line[0] == b'[':
+                if line[length - 1] == b']':
+                    return None, line[1:length - 1]
+                continue
+
+            found = <const char*>memchr(line, b':', length)
+            if found == NULL or found == line:
+                continue
+            key_end = found - line
+            for i in range(key_end):
+                if not _is_tag_char(line[i]):
+                    break
+            else:
+                start = key_end + 1
+                while start < length and (line[start] == b' ' or line[start] == b'\t'):
+                    start += 1
+                return line[:key_end], line[start:length]
+
+        raise StopIteration
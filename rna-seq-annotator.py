@@ -1,16 +1,446 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Union
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import re
 import logging
 from datetime import datetime
-import json
+import pickle
 from pathlib import Path
+from dataclasses import dataclass, fields
 import redis
-from pymongo import MongoClient
+import zstandard
+from numba import njit
+from pymongo import MongoClient, WriteConcern
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, OperationFailure
 from concurrent.futures import ThreadPoolExecutor
 import os
 import argparse
+from array import array
+import sys
+
+# Numba kernels live beside this file, in a module whose on-disk cache is keyed by a
+# fixed module name; make it importable when this file is loaded by path
+sys.path.append(str(Path(__file__).resolve().parent))
+from _kmer_kernels import HASH_MULTIPLIER, score_kmer_batch
+
+# Sequence columns are NumPy object arrays or (Arrow-backed) pandas extension arrays
+SequenceArray = Union[np.ndarray, pd.api.extensions.ExtensionArray]
+
+# Lookup table mapping ASCII bytes to 2-bit nucleotide codes (255 = not a base)
+_NUCLEOTIDE_CODES = np.full(256, 255, dtype=np.uint8)
+for _code, _bases in enumerate(('Aa', 'Cc', 'Gg', 'UuTt')):
+    for _base in _bases:
+        _NUCLEOTIDE_CODES[ord(_base)] = _code
+
+
+def _is_arrow_string_dtype(dtype: object) -> bool:
+    """Check whether a pandas dtype stores strings in Arrow buffers."""
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(
+            dtype.pyarrow_dtype
+        )
+    return isinstance(dtype, pd.StringDtype) and dtype.storage.startswith('pyarrow')
+
+
+def _encode_sequences(sequences: SequenceArray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode a batch of sequences into one flat array of nucleotide codes.
+    
+    Arrow-backed string arrays are read directly from their UTF-8 data and
+    offsets buffers; other arrays are joined into a single string first.
+    
+    Args:
+        sequences: Array of sequence strings
+        
+    Returns:
+        Tuple of (nucleotide codes, offsets of each sequence into the codes)
+    """
+    if hasattr(sequences, '__arrow_array__'):
+        arrow_array = pa.array(sequences)
+        if isinstance(arrow_array, pa.ChunkedArray):
+            arrow_array = arrow_array.combine_chunks()
+        arrow_array = arrow_array.cast(pa.large_string())
+        
+        _, offsets_buffer, data_buffer = arrow_array.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[
+            arrow_array.offset:arrow_array.offset + len(arrow_array) + 1
+        ]
+        raw = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer else np.empty(0, np.uint8)
+        return _NUCLEOTIDE_CODES[raw[offsets[0]:offsets[-1]]], offsets - offsets[0]
+    
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    
+    raw = np.frombuffer(''.join(sequences).encode('ascii', 'replace'), dtype=np.uint8)
+    return _NUCLEOTIDE_CODES[raw], offsets
+
+
+def _pack_2bit(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack nucleotide codes at 2 bits per base, 32 bases per 64-bit word.
+    
+    Base i is stored in bits 2 * (i % 32) of word i // 32. Ambiguous bases
+    cannot be represented in 2 bits, so they are flagged in a separate
+    1-bit-per-base mask (bit i % 8 of byte i // 8).
+    
+    Args:
+        codes: Flat array of nucleotide codes
+        
+    Returns:
+        Tuple of (packed int64 words, ambiguous-base bitmask)
+    """
+    words = np.zeros(-(-len(codes) // 32) * 32, dtype=np.uint64)
+    words[:len(codes)] = codes & 3
+    shifts = np.arange(0, 64, 2, dtype=np.uint64)
+    packed = np.bitwise_or.reduce(words.reshape(-1, 32) << shifts, axis=1)
+    
+    ambiguous = np.packbits(codes > 3, bitorder='little')
+    return packed.view(np.int64), ambiguous
+
+
+def _kmer_codes(codes: np.ndarray,
+                offsets: np.ndarray,
+                k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract the distinct k-mers of every sequence in an encoded batch.
+    
+    Args:
+        codes: Flat array of nucleotide codes
+        offsets: Offsets of each sequence into the codes
+        k: K-mer length (at most 31)
+        
+    Returns:
+        Tuple of (sequence index, k-mer code) arrays, one entry per distinct
+        k-mer of each sequence
+    """
+    if len(codes) < k:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    
+    windows = np.lib.stride_tricks.sliding_window_view(codes, k)
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    
+    # Keep windows made only of bases that do not span two sequences
+    valid = (windows < 4).all(axis=1) & (rows[:len(windows)] == rows[k - 1:])
+    weights = 4 ** np.arange(k - 1, -1, -1, dtype=np.int64)
+    kmers = windows[valid].astype(np.int64) @ weights
+    
+    pairs = np.unique(np.stack([rows[:len(windows)][valid], kmers], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+# Confidence scores are stored as fixed-point uint8, 0-255 mapping to 0.0-1.0
+CONFIDENCE_DTYPE = np.uint8
+CONFIDENCE_SCALE = 255
+
+
+# Float error allowed when converting to fixed point, so e.g. an average of exactly
+# 1.0 computed as 0.9999999999 is still stored as 255
+_CONFIDENCE_TOLERANCE = 1e-6
+
+
+def _quantize_confidence(confidence: Union[float, np.ndarray]) -> np.ndarray:
+    """Convert confidence scores between 0 and 1 to fixed-point uint8, rounding down."""
+    scaled = np.asarray(confidence) * CONFIDENCE_SCALE + _CONFIDENCE_TOLERANCE
+    return np.floor(scaled).astype(CONFIDENCE_DTYPE)
+
+
+def _confidence_threshold(min_confidence: float) -> int:
+    """
+    Convert a minimum confidence to the smallest fixed-point score that reaches it.
+    
+    Scores are rounded down and thresholds up, so a confidence below the
+    minimum never passes a fixed-point comparison.
+    """
+    return int(np.ceil(min_confidence * CONFIDENCE_SCALE - _CONFIDENCE_TOLERANCE))
+
+
+# Not cached on disk: it runs once per ontology load, and Numba's cache records the
+# importing module's name, which breaks loading this file under another name
+@njit(nogil=True)
+def _build_kmer_table(kmer_codes: np.ndarray, table_bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build an open-addressing hash table over distinct k-mer codes.
+    
+    Args:
+        kmer_codes: Distinct k-mer codes
+        table_bits: Log2 of the table size
+        
+    Returns:
+        Tuple of (slot keys, index into kmer_codes of each slot), both -1 for
+        empty slots
+    """
+    mask = (1 << table_bits) - 1
+    keys = np.full(mask + 1, -1, dtype=np.int64)
+    entries = np.full(mask + 1, -1, dtype=np.int32)
+    
+    for entry in range(len(kmer_codes)):
+        slot = ((kmer_codes[entry] * HASH_MULTIPLIER) >> (64 - table_bits)) & mask
+        while keys[slot] != -1:
+            slot = (slot + 1) & mask
+        keys[slot] = kmer_codes[entry]
+        entries[slot] = entry
+    
+    return keys, entries
+
+
+def _build_kmer_index(kmer_terms: np.ndarray, kmer_codes: np.ndarray) -> Tuple:
+    """
+    Build the inverted index from each distinct k-mer to the terms containing it.
+    
+    Args:
+        kmer_terms: Term index of each (term, k-mer) pair
+        kmer_codes: K-mer code of each (term, k-mer) pair
+        
+    Returns:
+        Tuple of (hash table slot keys, slot entries, log2 of the table size,
+        posting list offsets, posting list term indices)
+    """
+    order = np.argsort(kmer_codes, kind='stable')
+    unique_codes, posting_starts = np.unique(kmer_codes[order], return_index=True)
+    posting_offsets = np.append(posting_starts, len(order)).astype(np.int64)
+    table_bits = max(2 * len(unique_codes) - 1, 1).bit_length()
+    kmer_keys, kmer_entries = _build_kmer_table(unique_codes, table_bits)
+    
+    return kmer_keys, kmer_entries, table_bits, posting_offsets, kmer_terms[order].astype(np.int32)
+
+
+@dataclass
+class OntologyTable:
+    """
+    Column-oriented storage of the terms of one ontology.
+    
+    Synonyms and xrefs are stored as byte arenas: value j spans
+    synonym_bytes[synonym_bounds[j]:synonym_bounds[j + 1]], and the values of
+    term i are j in synonym_offsets[i]:synonym_offsets[i + 1].
+    """
+    ids: np.ndarray
+    names: np.ndarray
+    definitions: np.ndarray
+    synonym_offsets: np.ndarray
+    synonym_bounds: np.ndarray
+    synonym_bytes: np.ndarray
+    xref_offsets: np.ndarray
+    xref_bounds: np.ndarray
+    xref_bytes: np.ndarray
+    relationship_offsets: np.ndarray
+    relationship_data: np.ndarray
+    properties: np.ndarray
+    kmer_counts: np.ndarray
+    kmer_keys: np.ndarray
+    kmer_entries: np.ndarray
+    table_bits: int
+    posting_offsets: np.ndarray
+    posting_terms: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+# Bump whenever the OntologyTable fields change, so stale Redis cache entries are not reused
+ONTOLOGY_CACHE_VERSION = 1
+
+
+def _is_current_ontology_table(ontology: object) -> bool:
+    """Check that an unpickled object is an OntologyTable with the current fields."""
+    return isinstance(ontology, OntologyTable) and all(
+        hasattr(ontology, field.name) for field in fields(OntologyTable)
+    )
+
+
+# Compiled OBO tokenizer, built with "cythonize -i _obo_parser.pyx"
+try:
+    from _obo_parser import OboParser
+except ImportError:
+    OboParser = None
+
+# Matches an OBO stanza header, e.g. "[Term]", or a tag-value line,
+# e.g. "is_a: GO:0008150 ! biological_process"
+_OBO_LINE = re.compile(
+    rb'^(?:\[([^\r\n]*)\]|([A-Za-z_-]+):[ \t]*(.*?))[ \t\r]*$',
+    re.MULTILINE
+)
+
+
+def _iter_obo_tags(data: bytes) -> Iterator[Tuple[Optional[bytes], bytes]]:
+    """
+    Iterate over the (tag, value) pairs of an OBO file held in memory.
+    
+    Pure Python fallback for the compiled OboParser.
+    
+    Args:
+        data: Contents of the OBO file
+        
+    Yields:
+        (tag, value) byte pairs; stanza headers are yielded as (None, name)
+    """
+    for match in _OBO_LINE.finditer(data):
+        stanza, key, value = match.groups()
+        if stanza is not None:
+            yield None, stanza
+        else:
+            yield key, value
+
+
+class _OboTermBuilder:
+    """Accumulate parsed OBO terms into flat arena buffers."""
+    
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.definitions: List[str] = []
+        self.properties: List[Dict[str, str]] = []
+        self.relationship_data: List[Tuple[str, str]] = []
+        self.relationship_offsets = array('q', [0])
+        self.synonym_data = bytearray()
+        self.synonym_bounds = array('q', [0])
+        self.synonym_offsets = array('q', [0])
+        self.xref_data = bytearray()
+        self.xref_bounds = array('q', [0])
+        self.xref_offsets = array('q', [0])
+        self.current: Optional[Dict[str, Any]] = None
+    
+    @property
+    def term(self) -> Dict[str, Any]:
+        """Values of the term being parsed; only valid inside a [Term] stanza."""
+        if self.current is None:
+            raise ValueError("OBO tag outside a [Term] stanza")
+        return self.current
+    
+    def start_term(self) -> None:
+        """Close the current term and start a new one."""
+        self.end_term()
+        self.current = {'properties': {}}
+    
+    def end_term(self) -> None:
+        """Commit the current term, or discard its values if it has no id."""
+        if self.current is None:
+            return
+        
+        if 'id' in self.current:
+            self.ids.append(self.current['id'])
+            self.names.append(self.current.get('name', ''))
+            self.definitions.append(self.current.get('definition', ''))
+            self.properties.append(self.current['properties'])
+            self.relationship_offsets.append(len(self.relationship_data))
+            self.synonym_offsets.append(len(self.synonym_bounds) - 1)
+            self.xref_offsets.append(len(self.xref_bounds) - 1)
+        else:
+            del self.relationship_data[self.relationship_offsets[-1]:]
+            del self.synonym_bounds[self.synonym_offsets[-1] + 1:]
+            del self.synonym_data[self.synonym_bounds[-1]:]
+            del self.xref_bounds[self.xref_offsets[-1] + 1:]
+            del self.xref_data[self.xref_bounds[-1]:]
+        
+        self.current = None
+    
+    def build(self, kmer_size: int) -> OntologyTable:
+        """
+        Freeze the accumulated terms into an OntologyTable.
+        
+        Args:
+            kmer_size: K-mer length used for term signatures
+            
+        Returns:
+            OntologyTable holding the terms in file order
+        """
+        self.end_term()
+        
+        names = np.array(self.names, dtype=object)
+        synonym_offsets = np.frombuffer(self.synonym_offsets, dtype=np.int64)
+        synonym_bounds = np.frombuffer(self.synonym_bounds, dtype=np.int64)
+        synonym_bytes = np.frombuffer(self.synonym_data, dtype=np.uint8)
+        
+        # Term signatures are the k-mers of the name and synonyms
+        name_terms, name_kmers = _kmer_codes(*_encode_sequences(names), kmer_size)
+        synonym_rows, synonym_kmers = _kmer_codes(
+            _NUCLEOTIDE_CODES[synonym_bytes], synonym_bounds, kmer_size
+        )
+        synonym_terms = np.repeat(np.arange(len(names)), np.diff(synonym_offsets))
+        pairs = np.unique(np.stack([
+            np.concatenate([name_terms, synonym_terms[synonym_rows]]),
+            np.concatenate([name_kmers, synonym_kmers])
+        ], axis=1), axis=0)
+        
+        kmer_keys, kmer_entries, table_bits, posting_offsets, posting_terms = (
+            _build_kmer_index(pairs[:, 0], pairs[:, 1])
+        )
+        
+        return OntologyTable(
+            ids=np.array(self.ids, dtype=object),
+            names=names,
+            definitions=np.array(self.definitions, dtype=object),
+            synonym_offsets=synonym_offsets,
+            synonym_bounds=synonym_bounds,
+            synonym_bytes=synonym_bytes,
+            xref_offsets=np.frombuffer(self.xref_offsets, dtype=np.int64),
+            xref_bounds=np.frombuffer(self.xref_bounds, dtype=np.int64),
+            xref_bytes=np.frombuffer(self.xref_data, dtype=np.uint8),
+            relationship_offsets=np.frombuffer(self.relationship_offsets, dtype=np.int64),
+            relationship_data=np.fromiter(
+                self.relationship_data, dtype=object, count=len(self.relationship_data)
+            ),
+            properties=np.fromiter(self.properties, dtype=object, count=len(self.properties)),
+            kmer_counts=np.bincount(pairs[:, 0], minlength=len(names)),
+            kmer_keys=kmer_keys,
+            kmer_entries=kmer_entries,
+            table_bits=table_bits,
+            posting_offsets=posting_offsets,
+            posting_terms=posting_terms
+        )
+
+
+def _set_id(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.term['id'] = value.decode()
+
+
+def _set_name(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.term['name'] = value.decode()
+
+
+def _set_definition(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.term['definition'] = value.decode()
+
+
+def _add_synonym(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.synonym_data += value
+    builder.synonym_bounds.append(len(builder.synonym_data))
+
+
+def _add_xref(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.xref_data += value
+    builder.xref_bounds.append(len(builder.xref_data))
+
+
+def _add_is_a(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.relationship_data.append(('is_a', value.split(b'!')[0].strip().decode()))
+
+
+def _add_relationship(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    rel_type, target = value.split(b' ', 1)
+    builder.relationship_data.append(
+        (rel_type.decode(), target.split(b'!')[0].strip().decode())
+    )
+
+
+def _set_property(builder: _OboTermBuilder, key: bytes, value: bytes) -> None:
+    builder.term['properties'][key.decode()] = value.decode()
+
+
+# Handlers for OBO tags, keyed by the raw tag bytes
+_OBO_HANDLERS = {
+    b'id': _set_id,
+    b'name': _set_name,
+    b'def': _set_definition,
+    b'synonym': _add_synonym,
+    b'xref': _add_xref,
+    b'is_a': _add_is_a,
+    b'relationship': _add_relationship
+}
+
 
 class RNASeqAnnotator:
     def __init__(self, 
@@ -25,36 +455,53 @@ class RNASeqAnnotator:
             mongodb_uri: Optional MongoDB connection URI
             redis_url: Optional Redis connection URL
         """
-        self.ontologies = {}
+        self.ontologies: Dict[str, OntologyTable] = {}
         self.logger = self._setup_logger()
-        self._load_ontologies(ontology_files)
+        
+        # Load configuration
+        self.config = self._load_config()
         
         # Initialize database connections
-        self.mongo_client = MongoClient(mongodb_uri) if mongodb_uri else None
+        self.mongo_client: Optional[MongoClient] = MongoClient(mongodb_uri) if mongodb_uri else None
         self.redis_client = redis.from_url(redis_url) if redis_url else None
         
-        # Load configuration
-        self.config = self._load_config()
+        self._load_ontologies(ontology_files)
         
     def _load_config(self) -> Dict:
         """Load configuration from environment variables or default values."""
-        return {
+        config = {
             'max_workers': int(os.getenv('MAX_WORKERS', 4)),
             'batch_size': int(os.getenv('BATCH_SIZE', 1000)),
             'cache_expiry': int(os.getenv('CACHE_EXPIRY', 3600)),
-            'min_confidence': float(os.getenv('MIN_CONFIDENCE', 0.8))
+            'min_confidence': float(os.getenv('MIN_CONFIDENCE', 0.8)),
+            'kmer_size': int(os.getenv('KMER_SIZE', 8))
         }
         
+        # K-mer codes are packed at 2 bits per base into signed 64-bit integers
+        if not 1 <= config['kmer_size'] <= 31:
+            raise ValueError(
+                f"KMER_SIZE must be between 1 and 31, got {config['kmer_size']}"
+            )
+        
+        return config
+        
     def _setup_logger(self) -> logging.Logger:
         """Set up logging configuration."""
         logger = logging.getLogger('RNASeqAnnotator')
+        
+        # Handlers are attached once per process, however many annotators exist
+        if logger.handlers:
+            return logger
+        
         logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+        logger.propagate = False
         
-        # File handler
+        # File handler, opened on first write
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
         file_handler = logging.FileHandler(
-            log_dir / f'rna_seq_annotator_{datetime.now():%Y%m%d}.log'
+            log_dir / f'rna_seq_annotator_{datetime.now():%Y%m%d}.log',
+            delay=True
         )
         
         # Console handler
@@ -79,32 +526,74 @@ class RNASeqAnnotator:
         Args:
             ontology_files: Dictionary mapping ontology names to file paths
         """
+        cache_keys = {
+            ontology_name: (
+                f"ontology:{ontology_name}:v{ONTOLOGY_CACHE_VERSION}:k{self.config['kmer_size']}"
+            )
+            for ontology_name in ontology_files
+        }
+        
+        # Check Redis cache first, fetching all ontologies in one round trip
+        cached_ontologies: Dict[str, bytes] = {}
+        if self.redis_client and cache_keys:
+            try:
+                # Missing keys come back as None and are left to be parsed
+                cached_ontologies = {
+                    ontology_name: cached_ontology
+                    for ontology_name, cached_ontology in zip(
+                        cache_keys, self.redis_client.mget(list(cache_keys.values()))
+                    )
+                    if isinstance(cached_ontology, bytes)
+                }
+            except Exception as e:
+                self.logger.error(f"Failed to read ontology cache: {str(e)}")
+        
+        uncached_ontologies = []
         for ontology_name, file_path in ontology_files.items():
             try:
-                # Check Redis cache first
-                if self.redis_client:
-                    cached_ontology = self.redis_client.get(f"ontology:{ontology_name}")
-                    if cached_ontology:
-                        self.ontologies[ontology_name] = json.loads(cached_ontology)
+                cached_ontology = cached_ontologies.get(ontology_name)
+                if cached_ontology:
+                    # Entries that cannot be decoded are treated as stale and replaced
+                    try:
+                        ontology = pickle.loads(zstandard.decompress(cached_ontology))
+                    except Exception as e:
+                        ontology = None
+                        self.logger.warning(
+                            f"Failed to decode cached {ontology_name} ontology: {str(e)}"
+                        )
+                    if _is_current_ontology_table(ontology):
+                        self.ontologies[ontology_name] = ontology
                         self.logger.info(f"Loaded {ontology_name} ontology from cache")
                         continue
+                    if ontology is not None:
+                        self.logger.warning(f"Ignoring stale cached {ontology_name} ontology")
                 
                 # Parse file if not in cache
                 self.ontologies[ontology_name] = self._parse_obo_file(file_path)
-                
-                # Store in cache
-                if self.redis_client:
-                    self.redis_client.setex(
-                        f"ontology:{ontology_name}",
-                        self.config['cache_expiry'],
-                        json.dumps(self.ontologies[ontology_name])
-                    )
+                uncached_ontologies.append(ontology_name)
                 
                 self.logger.info(f"Loaded {ontology_name} ontology from {file_path}")
             except Exception as e:
                 self.logger.error(f"Failed to load {ontology_name} ontology: {str(e)}")
+        
+        # Store parsed ontologies in cache with a single pipelined write
+        if self.redis_client and uncached_ontologies:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                for ontology_name in uncached_ontologies:
+                    pipeline.setex(
+                        cache_keys[ontology_name],
+                        self.config['cache_expiry'],
+                        zstandard.compress(
+                            pickle.dumps(self.ontologies[ontology_name], protocol=5),
+                            level=3
+                        )
+                    )
+                pipeline.execute()
+            except Exception as e:
+                self.logger.error(f"Failed to cache ontologies: {str(e)}")
                 
-    def _parse_obo_file(self, file_path: str) -> Dict:
+    def _parse_obo_file(self, file_path: str) -> OntologyTable:
         """
         Parse an OBO format ontology file.
         
@@ -112,56 +601,25 @@ class RNASeqAnnotator:
             file_path: Path to the OBO file
             
         Returns:
-            Dictionary containing parsed ontology terms and relationships
+            OntologyTable containing parsed ontology terms and relationships
         """
-        terms = {}
-        current_term = None
-        
-        with open(file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                
-                if line.startswith('[Term]'):
-                    if current_term:
-                        terms[current_term['id']] = current_term
-                    current_term = {
-                        'relationships': [],
-                        'synonyms': [],
-                        'xrefs': [],
-                        'properties': {}
-                    }
-                elif not current_term or not line:
-                    continue
-                elif ':' in line:
-                    key, value = line.split(':', 1)
-                    value = value.strip()
-                    
-                    if key == 'id':
-                        current_term['id'] = value
-                    elif key == 'name':
-                        current_term['name'] = value
-                    elif key == 'def':
-                        current_term['definition'] = value
-                    elif key == 'synonym':
-                        current_term['synonyms'].append(value)
-                    elif key == 'xref':
-                        current_term['xrefs'].append(value)
-                    elif key == 'is_a':
-                        current_term['relationships'].append(
-                            ('is_a', value.split('!')[0].strip())
-                        )
-                    elif key == 'relationship':
-                        rel_type, target = value.split(' ', 1)
-                        current_term['relationships'].append(
-                            (rel_type, target.split('!')[0].strip())
-                        )
-                    else:
-                        current_term['properties'][key] = value
-                    
-        if current_term:
-            terms[current_term['id']] = current_term
-            
-        return terms
+        builder = _OboTermBuilder()
+        
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        
+        tags = OboParser(data) if OboParser is not None else _iter_obo_tags(data)
+        for key, value in tags:
+            # Stanza headers close the current term; only [Term] stanzas are kept
+            if key is None:
+                if value == b'Term':
+                    builder.start_term()
+                else:
+                    builder.end_term()
+            elif builder.current is not None:
+                _OBO_HANDLERS.get(key, _set_property)(builder, key, value)
+        
+        return builder.build(self.config['kmer_size'])
     
     def annotate_sequence(self,
                          sequence_data: pd.DataFrame,
@@ -180,136 +638,221 @@ class RNASeqAnnotator:
         """
         self.logger.info(f"Starting annotation of {len(sequence_data)} sequences")
         
-        # Split data into batches for parallel processing
+        # Preallocate output columns; each batch fills its own slice of them
+        outputs = {}
+        for ontology_name in required_ontologies:
+            if ontology_name not in self.ontologies:
+                self.logger.error(f"Required ontology {ontology_name} not loaded")
+                continue
+            outputs[ontology_name] = (
+                np.empty(len(sequence_data), dtype=object),
+                np.zeros(len(sequence_data), dtype=CONFIDENCE_DTYPE)
+            )
+        
+        # Batches are row ranges over one shared sequence array, kept Arrow-backed
+        # when pandas stores strings in Arrow so batches read its buffers directly
+        sequence_column = sequence_data['sequence']
+        # Other Arrow types, e.g. null for an all-empty column, cannot be filled with ''
+        if isinstance(sequence_column.dtype, pd.ArrowDtype) and not _is_arrow_string_dtype(
+            sequence_column.dtype
+        ):
+            sequence_column = sequence_column.astype(pd.ArrowDtype(pa.large_string()))
+        sequence_column = sequence_column.fillna('')
+        if _is_arrow_string_dtype(sequence_column.dtype):
+            sequences = sequence_column.array
+        else:
+            sequences = sequence_column.astype(str).to_numpy(dtype=object)
         batch_size = self.config['batch_size']
-        batches = [
-            sequence_data[i:i + batch_size] 
-            for i in range(0, len(sequence_data), batch_size)
-        ]
         
-        annotated_batches = []
+        # The Numba scoring kernel releases the GIL, so batches score in parallel threads
         with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
             futures = [
                 executor.submit(
                     self._annotate_batch,
-                    batch,
-                    required_ontologies
+                    sequences,
+                    start,
+                    min(start + batch_size, len(sequences)),
+                    outputs
                 )
-                for batch in batches
+                for start in range(0, len(sequences), batch_size)
             ]
             
             for future in futures:
                 try:
-                    annotated_batches.append(future.result())
+                    future.result()
                 except Exception as e:
                     self.logger.error(f"Batch annotation failed: {str(e)}")
         
-        # Combine batches
-        annotated_data = pd.concat(annotated_batches, ignore_index=True)
+        columns = {}
+        for ontology_name, (annotations, confidences) in outputs.items():
+            columns[f"{ontology_name}_annotation"] = annotations
+            columns[f"{ontology_name}_confidence"] = confidences
+        annotated_data = sequence_data.assign(**columns)
         
         # Save to MongoDB if configured
         if self.mongo_client:
             try:
-                db = self.mongo_client.rna_seq_db
-                collection = db.annotations
-                collection.insert_many(annotated_data.to_dict('records'))
-                self.logger.info("Saved annotations to MongoDB")
+                self._save_to_mongodb(self.mongo_client, annotated_data)
             except Exception as e:
                 self.logger.error(f"Failed to save to MongoDB: {str(e)}")
         
         # Save to file if specified
         if output_file:
             try:
-                annotated_data.to_csv(output_file, index=False)
+                self._save_output(annotated_data, output_file)
                 self.logger.info(f"Saved annotated data to {output_file}")
             except Exception as e:
                 self.logger.error(f"Failed to save annotated data: {str(e)}")
         
         return annotated_data
     
-    def _annotate_batch(self,
-                       batch: pd.DataFrame,
-                       required_ontologies: List[str]) -> pd.DataFrame:
+    def _save_output(self, annotated_data: pd.DataFrame, output_file: str) -> None:
         """
-        Annotate a batch of sequences.
+        Save annotated data as Parquet, or as CSV when the file has a .csv suffix.
         
         Args:
-            batch: DataFrame containing a batch of sequences
-            required_ontologies: List of ontology names to use
-            
-        Returns:
-            Annotated DataFrame
+            annotated_data: DataFrame with annotations
+            output_file: Path to save annotated data
+        """
+        if Path(output_file).suffix.lower() == '.csv':
+            annotated_data.to_csv(output_file, index=False)
+        else:
+            annotated_data.to_parquet(
+                output_file,
+                engine='pyarrow',
+                compression='zstd',
+                index=False,
+                use_dictionary=True
+            )
+    
+    def _save_to_mongodb(self, mongo_client: MongoClient, annotated_data: pd.DataFrame) -> None:
         """
-        annotated_batch = batch.copy()
+        Save annotated data to MongoDB in parallel unordered bulk inserts.
         
-        for ontology_name in required_ontologies:
-            if ontology_name not in self.ontologies:
-                self.logger.error(f"Required ontology {ontology_name} not loaded")
-                continue
-            
-            annotation_col = f"{ontology_name}_annotation"
-            confidence_col = f"{ontology_name}_confidence"
-            
-            annotations = []
-            confidences = []
-            
-            for _, row in batch.iterrows():
-                terms, confidence = self._find_matching_terms(row, ontology_name)
-                annotations.append(terms)
-                confidences.append(confidence)
-            
-            annotated_batch[annotation_col] = annotations
-            annotated_batch[confidence_col] = confidences
+        Args:
+            mongo_client: Connected MongoDB client
+            annotated_data: DataFrame with annotations
+        """
+        collection = mongo_client.rna_seq_db.annotations.with_options(
+            write_concern=WriteConcern(w=1, j=False)
+        )
+        if 'sequence_id' in annotated_data.columns:
+            # Re-saved sequences are skipped; rows without a string ID are not deduplicated
+            try:
+                collection.create_index(
+                    'sequence_id',
+                    name='sequence_id_unique',
+                    unique=True,
+                    partialFilterExpression={'sequence_id': {'$type': 'string'}}
+                )
+            except OperationFailure as e:
+                self.logger.warning(
+                    f"Could not create unique sequence_id index, "
+                    f"duplicate annotations will be saved: {str(e)}"
+                )
+        
+        batch_size = self.config['batch_size']
+        with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
+            futures = [
+                executor.submit(
+                    self._insert_chunk,
+                    collection,
+                    annotated_data.iloc[i:i + batch_size]
+                )
+                for i in range(0, len(annotated_data), batch_size)
+            ]
+            inserted = sum(future.result() for future in futures)
         
-        return annotated_batch
+        self.logger.info(f"Saved {inserted} annotations to MongoDB")
     
-    def _find_matching_terms(self,
-                           row: pd.Series,
-                           ontology_name: str) -> Tuple[List[str], float]:
+    def _insert_chunk(self, collection: Collection, chunk: pd.DataFrame) -> int:
         """
-        Find matching ontology terms for a sequence with confidence scores.
+        Insert one chunk of annotated data, skipping documents that fail.
         
         Args:
-            row: DataFrame row containing sequence information
-            ontology_name: Name of the ontology to search
+            collection: MongoDB collection to insert into
+            chunk: DataFrame slice to insert
             
         Returns:
-            Tuple of (matching term IDs, confidence score)
+            Number of inserted documents
         """
-        matches = []
-        confidence_scores = []
-        ontology = self.ontologies[ontology_name]
-        
-        sequence = row['sequence']
+        try:
+            result = collection.insert_many(
+                chunk.to_dict('records'),
+                ordered=False,
+                bypass_document_validation=True
+            )
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            failed = len(e.details.get('writeErrors', []))
+            self.logger.warning(f"Skipped {failed} documents while saving to MongoDB")
+            return e.details.get('nInserted', 0)
+    
+    def _annotate_batch(self,
+                       sequences: SequenceArray,
+                       start: int,
+                       end: int,
+                       outputs: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> None:
+        """
+        Annotate a range of sequences into preallocated output columns.
         
-        for term_id, term_data in ontology.items():
-            confidence = self._calculate_match_confidence(sequence, term_data)
-            
-            if confidence >= self.config['min_confidence']:
-                matches.append(term_id)
-                confidence_scores.append(confidence)
-        
-        # Return matches and average confidence if matches found
-        if matches:
-            return matches, np.mean(confidence_scores)
-        return [], 0.0
-    
-    def _calculate_match_confidence(self,
-                                  sequence: str,
-                                  term_data: Dict) -> float:
+        Args:
+            sequences: Array of all RNA sequences
+            start: First row of the batch
+            end: Row after the last row of the batch
+            outputs: Output (annotations, confidences) arrays keyed by ontology name
+        """
+        # Score each distinct sequence once and scatter the results to duplicates
+        sequence_codes, unique_sequences = pd.factorize(sequences[start:end])
+        
+        for ontology_name, (annotations, confidences) in outputs.items():
+            batch_annotations, batch_confidences = self._find_matches_batch(
+                unique_sequences, ontology_name
+            )
+            annotations[start:end] = batch_annotations[sequence_codes]
+            confidences[start:end] = batch_confidences[sequence_codes]
+    
+    def _find_matches_batch(self,
+                            sequences: SequenceArray,
+                            ontology_name: str) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate confidence score for a sequence matching an ontology term.
+        Find matching ontology terms for a batch of sequences with confidence scores.
         
         Args:
-            sequence: RNA sequence
-            term_data: Dictionary containing term information
+            sequences: Array of RNA sequences
+            ontology_name: Name of the ontology to search
             
         Returns:
-            Confidence score between 0 and 1
+            Tuple of (matching term ID lists, fixed-point average confidence)
+            arrays, one entry per sequence
         """
-        # Implement your sequence matching logic here
-        # This is a placeholder implementation
-        return 0.0
+        ontology = self.ontologies[ontology_name]
+        
+        codes, offsets = _encode_sequences(sequences)
+        packed, ambiguous = _pack_2bit(codes)
+        del codes
+        
+        match_offsets, match_terms, confidences = score_kmer_batch(
+            packed,
+            ambiguous,
+            offsets,
+            ontology.kmer_keys,
+            ontology.kmer_entries,
+            ontology.posting_offsets,
+            ontology.posting_terms,
+            1.0 / np.maximum(ontology.kmer_counts, 1),
+            self.config['min_confidence'],
+            self.config['kmer_size'],
+            ontology.table_bits
+        )
+        
+        # Group matching term IDs by sequence
+        matches = np.split(ontology.ids[match_terms], match_offsets[1:-1])
+        annotations = np.empty(len(sequences), dtype=object)
+        for i, terms in enumerate(matches):
+            annotations[i] = terms.tolist()
+        
+        return annotations, _quantize_confidence(confidences)
     
     def validate_annotations(self,
                            annotated_data: pd.DataFrame,
@@ -325,9 +868,8 @@ class RNASeqAnnotator:
             DataFrame with validation status column added
         """
         validated_data = annotated_data.copy()
-        validated_data['validation_status'] = validated_data.apply(
-            lambda row: self._validate_row(row, validation_rules),
-            axis=1
+        validated_data['validation_status'] = self._validation_status(
+            annotated_data, validation_rules
         )
         
         # Log validation statistics
@@ -336,33 +878,65 @@ class RNASeqAnnotator:
         
         return validated_data
     
-    def _validate_row(self, row: pd.Series, validation_rules: Dict) -> str:
+    def _validation_status(self,
+                           annotated_data: pd.DataFrame,
+                           validation_rules: Dict) -> np.ndarray:
         """
-        Validate a single row of annotations.
+        Compute the validation status of every row of annotations.
         
         Args:
-            row: DataFrame row with annotations
+            annotated_data: DataFrame with annotations
             validation_rules: Dictionary of validation rules
             
         Returns:
-            Validation status string
+            Array of validation status strings, one per row
         """
-        # Check required ontologies
+        min_confidence = validation_rules.get('min_confidence', 0.8)
+        conditions = [np.zeros(len(annotated_data), dtype=bool)]
+        choices = ["PASS"]
+        
+        # Check required ontologies; the first failing check of a row wins
         for ontology in validation_rules.get('required_ontologies', []):
-            if not row.get(f"{ontology}_annotation"):
-                return "MISSING_REQUIRED_ANNOTATION"
+            annotation_col = f"{ontology}_annotation"
+            confidence_col = f"{ontology}_confidence"
+            
+            if annotation_col in annotated_data.columns:
+                annotations = annotated_data[annotation_col]
+                # Arrow list columns come from reading Parquet output with the pyarrow backend
+                if isinstance(annotations.dtype, pd.ArrowDtype) and (
+                    pa.types.is_list(annotations.dtype.pyarrow_dtype)
+                    or pa.types.is_large_list(annotations.dtype.pyarrow_dtype)
+                ):
+                    annotation_lengths = pc.list_value_length(pa.array(annotations.array))
+                    missing = annotation_lengths.fill_null(0).to_numpy() == 0
+                else:
+                    annotation_lengths = annotations.map(len, na_action='ignore')
+                    missing = ~annotation_lengths.gt(0).to_numpy(dtype=bool)
+            else:
+                missing = np.ones(len(annotated_data), dtype=bool)
+            
+            if confidence_col in annotated_data.columns:
+                confidence = annotated_data[confidence_col].fillna(0).to_numpy()
+            else:
+                confidence = np.zeros(len(annotated_data), dtype=CONFIDENCE_DTYPE)
             
-            confidence = row.get(f"{ontology}_confidence", 0)
-            if confidence < validation_rules.get('min_confidence', 0.8):
-                return "LOW_CONFIDENCE"
+            # Fixed-point confidences are compared against a fixed-point threshold
+            if np.issubdtype(confidence.dtype, np.integer):
+                low_confidence = confidence < _confidence_threshold(min_confidence)
+            else:
+                low_confidence = confidence < min_confidence
+            
+            conditions += [missing, low_confidence]
+            choices += ["MISSING_REQUIRED_ANNOTATION", "LOW_CONFIDENCE"]
         
-        return "PASS"
+        return np.select(conditions, choices, default="PASS")
 
 def main():
     """Main function for command-line usage."""
     parser = argparse.ArgumentParser(description='RNA-Seq Data Annotator')
     parser.add_argument('--input', required=True, help='Input CSV file path')
-    parser.add_argument('--output', required=True, help='Output CSV file path')
+    parser.add_argument('--output', required=True,
+                        help='Output file path (CSV for a .csv suffix, Parquet otherwise)')
     parser.add_argument('--ontology-dir', required=True, help='Directory containing ontology files')
     parser.add_argument('--mongodb-uri', help='MongoDB connection URI')
     parser.add_argument('--redis-url', help='Redis connection URL')
@@ -383,7 +957,12 @@ def main():
     )
     
     # Load and annotate sequences
-    sequence_data = pd.read_csv(args.input)
+    sequence_data = pd.read_csv(
+        args.input,
+        engine='pyarrow',
+        dtype_backend='pyarrow',
+        dtype={'sequence': pd.ArrowDtype(pa.large_string())}
+    )
     annotated_data = annotator.annotate_sequence(
         sequence_data,
         required_ontologies=['GO', 'SO'],
@@ -0,0 +1,15 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# The module file name is not importable, so load it under the name the README uses
+if 'rna_seq_annotator' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        'rna_seq_annotator', ROOT / 'rna-seq-annotator.py'
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['rna_seq_annotator'] = _module
+    _spec.loader.exec_module(_module)
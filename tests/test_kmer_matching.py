@@ -0,0 +1,137 @@
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import rna_seq_annotator as annotator
+
+ONTOLOGY_FILE = Path(__file__).parent / 'data' / 'test_ontology.obo'
+
+
+def _reference_kmers(text, k):
+    """Distinct k-mers of text, skipping windows with a character that is not a base."""
+    text = text.upper().replace('T', 'U')
+    return {
+        text[i:i + k] for i in range(len(text) - k + 1)
+        if set(text[i:i + k]) <= set('ACGU')
+    }
+
+
+def _reference_terms(path):
+    """(id, name and synonym values) of every [Term] stanza with an id, in file order."""
+    terms = []
+    stanza = None
+    for line in path.read_text().splitlines():
+        if line.startswith('['):
+            stanza = {'texts': []} if line == '[Term]' else None
+            if stanza is not None:
+                terms.append(stanza)
+            continue
+        key, _, value = line.partition(':')
+        if stanza is not None and key == 'id':
+            stanza['id'] = value.strip()
+        elif stanza is not None and key in ('name', 'synonym'):
+            stanza['texts'].append(value.strip())
+    return [(term['id'], term['texts']) for term in terms if 'id' in term]
+
+
+def _reference_matches(sequence, terms, k, min_confidence):
+    """Brute-force set overlap between a sequence and every term signature."""
+    sequence_kmers = _reference_kmers(sequence or '', k)
+    matches, confidences = [], []
+    for term_id, texts in terms:
+        signature = set().union(*(_reference_kmers(text, k) for text in texts))
+        if not signature:
+            continue
+        confidence = len(signature & sequence_kmers) / len(signature)
+        if confidence >= min_confidence:
+            matches.append(term_id)
+            confidences.append(confidence)
+    return matches, np.mean(confidences) if confidences else 0.0
+
+
+def _sequences(terms, k):
+    """Sequences built from term k-mers, with ambiguous bases, duplicates and blanks."""
+    rng = random.Random(0)
+    fragments = sorted(set().union(*(
+        _reference_kmers(text, k) for _, texts in terms for text in texts
+    )))
+    sequences = ['', None, 'NNNN', 'ACGU', 'acgunacgu', 'TTGACCTTGACC']
+    for _ in range(60):
+        parts = [rng.choice(fragments) for _ in range(rng.randint(1, 6))]
+        noise = [rng.choice(['', 'N', 'a', 'GC', 'T']) for _ in parts]
+        sequences.append(''.join(p + n for p, n in zip(parts, noise)))
+    return sequences + sequences[6:16]
+
+
+@pytest.fixture
+def make_annotator(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('BATCH_SIZE', '7')
+
+    def make(kmer_size, min_confidence):
+        monkeypatch.setenv('KMER_SIZE', str(kmer_size))
+        monkeypatch.setenv('MIN_CONFIDENCE', str(min_confidence))
+        return annotator.RNASeqAnnotator({'TEST': str(ONTOLOGY_FILE)})
+
+    return make
+
+
+@pytest.mark.parametrize('kmer_size', [4, 8])
+@pytest.mark.parametrize('min_confidence', [0.3, 1.0])
+def test_find_matches_batch_matches_brute_force(make_annotator, kmer_size, min_confidence):
+    rna_annotator = make_annotator(kmer_size, min_confidence)
+    terms = _reference_terms(ONTOLOGY_FILE)
+    sequences = np.array([s or '' for s in _sequences(terms, kmer_size)], dtype=object)
+
+    annotations, confidences = rna_annotator._find_matches_batch(sequences, 'TEST')
+
+    for sequence, matches, confidence in zip(sequences, annotations, confidences):
+        expected_matches, expected_confidence = _reference_matches(
+            sequence, terms, kmer_size, min_confidence
+        )
+        assert matches == expected_matches, sequence
+        assert confidence == annotator._quantize_confidence(expected_confidence), sequence
+
+
+@pytest.mark.parametrize('dtype', [object, 'string[pyarrow]', pd.ArrowDtype(pa.large_string())])
+def test_annotate_sequence_matches_brute_force(make_annotator, dtype):
+    rna_annotator = make_annotator(8, 0.3)
+    terms = _reference_terms(ONTOLOGY_FILE)
+    sequences = _sequences(terms, 8)
+    sequence_data = pd.DataFrame({
+        'sequence_id': [f'seq{i:03d}' for i in range(len(sequences))],
+        'sequence': pd.Series(sequences, dtype=dtype)
+    })
+
+    annotated_data = rna_annotator.annotate_sequence(sequence_data, ['TEST'])
+
+    assert annotated_data['TEST_confidence'].dtype == annotator.CONFIDENCE_DTYPE
+    for sequence, matches, confidence in zip(
+        sequences, annotated_data['TEST_annotation'], annotated_data['TEST_confidence']
+    ):
+        expected_matches, expected_confidence = _reference_matches(sequence, terms, 8, 0.3)
+        assert matches == expected_matches, sequence
+        assert confidence == annotator._quantize_confidence(expected_confidence), sequence
+
+
+def test_quantized_confidence_never_passes_below_threshold():
+    confidences = np.linspace(0, 1, 2001)
+    for min_confidence in np.linspace(0, 1, 101):
+        stored = annotator._quantize_confidence(confidences)
+        passes = stored >= annotator._confidence_threshold(min_confidence)
+        assert not (passes & (confidences < min_confidence - 1e-9)).any()
+
+
+@pytest.mark.parametrize('dtype', [pd.ArrowDtype(pa.null()), pd.ArrowDtype(pa.int64())])
+def test_annotate_sequence_casts_non_string_arrow_columns(make_annotator, dtype):
+    rna_annotator = make_annotator(8, 0.3)
+    sequence_data = pd.DataFrame({'sequence': pd.Series([None, None], dtype=dtype)})
+
+    annotated_data = rna_annotator.annotate_sequence(sequence_data, ['TEST'])
+
+    assert annotated_data['TEST_annotation'].tolist() == [[], []]
+    assert annotated_data['TEST_confidence'].tolist() == [0, 0]
@@ -0,0 +1,72 @@
+import pytest
+
+import rna_seq_annotator as annotator
+
+obo_parser = pytest.importorskip('_obo_parser', reason='compiled OBO parser is not built')
+
+
+OBO_SAMPLES = {
+    'lf': (
+        b'format-version: 1.2\n'
+        b'\n'
+        b'[Term]\n'
+        b'id: GO:0000001\n'
+        b'name: ACGUACGUACGU\n'
+        b'def: "A definition: with a colon." [GOC:xx]\n'
+        b'is_a: GO:0008150 ! biological_process\n'
+    ),
+    'crlf': (
+        b'[Term]\r\n'
+        b'id: GO:0000002\r\n'
+        b'name: UUUUUUUUUUUU  \r\n'
+        b'synonym: "GGGGCCCC" EXACT []\r\n'
+        b'[Term]  \r\n'
+    ),
+    'empty_values': (
+        b'[Term]\n'
+        b'id: GO:0000003\n'
+        b'name:\n'
+        b'comment:   \t\n'
+        b'xref:'
+    ),
+    'non_tag_lines': (
+        b'[Term]\n'
+        b'id: GO:0000004\n'
+        b'  name: indented\n'
+        b'not a tag line\n'
+        b'bad tag: value\n'
+        b'tag1: digits\n'
+        b': no tag\n'
+        b'[Unclosed\n'
+        b'! comment\n'
+    ),
+    'typedef': (
+        b'[Term]\n'
+        b'id: GO:0000005\n'
+        b'relationship: part_of GO:0000001 ! parent\n'
+        b'[Typedef]\n'
+        b'id: part_of\n'
+        b'name: part of\n'
+        b'is_transitive: true\n'
+    ),
+    'bracket_in_header': (
+        b'[Te]rm]\n'
+        b'id: GO:0000006\n'
+    ),
+}
+
+
+@pytest.mark.parametrize('data', OBO_SAMPLES.values(), ids=OBO_SAMPLES.keys())
+def test_compiled_parser_matches_regex_tokenizer(data):
+    assert list(obo_parser.OboParser(data)) == list(annotator._iter_obo_tags(data))
+
+
+def test_compiled_parser_tokens():
+    tags = list(obo_parser.OboParser(OBO_SAMPLES['crlf'] + OBO_SAMPLES['typedef']))
+    assert tags[:4] == [
+        (None, b'Term'),
+        (b'id', b'GO:0000002'),
+        (b'name', b'UUUUUUUUUUUU'),
+        (b'synonym', b'"GGGGCCCC" EXACT []'),
+    ]
+    assert (None, b'Typedef') in tags